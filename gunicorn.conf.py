@@ -0,0 +1,19 @@
+"""
+Gunicorn configuration
+
+Gunicorn loads this file from the working directory. The service runs on
+gevent workers so that each worker keeps serving other requests while one
+is waiting on the database.
+"""
+import os
+
+worker_class = "gevent"
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "500"))
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Makes psycopg2 yield to other greenlets while waiting on the database"""
+    # pylint: disable=import-outside-toplevel
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
@@ -8,6 +8,8 @@ import sys
 from flask import Flask
 from service import config
 from service.common import log_handlers
+from service.common.json_provider import OrjsonProvider
+from service.common.converters import IdConverter
 from flask_talisman import Talisman
 from flask_cors import CORS
 
@@ -15,6 +17,12 @@ from flask_cors import CORS
 app = Flask(__name__)
 app.config.from_object(config)
 
+# Serialize and parse JSON with orjson
+app.json = OrjsonProvider(app)
+
+# Validate ids in URLs with a bounded integer converter
+app.url_map.converters["id"] = IdConverter
+
 # Secure flask application using Talisman
 talisman = Talisman(app)
 
@@ -28,6 +36,11 @@ from service import routes, models  # noqa: F401 E402
 # pylint: disable=wrong-import-position
 from service.common import error_handlers, cli_commands  # noqa: F401 E402
 
+# Return database connections to the pool at the end of every request.
+# The app context stays pushed after init_db(), so Flask-SQLAlchemy's own
+# app context teardown does not run between requests.
+app.teardown_request(models.remove_session)
+
 # Set up logging for production
 log_handlers.init_logging(app, "gunicorn.error")
 
@@ -0,0 +1,56 @@
+"""
+Module: cache
+
+Thread safe read-through cache
+"""
+from threading import Lock
+from cachetools import TTLCache
+
+
+class ReadThroughCache:
+    """TTL cache that fills itself from a loader on a miss
+
+    Values loaded while an eviction was in progress are returned but not
+    stored, since the write behind that eviction may have committed after
+    the value was read. A maxsize of 0 disables caching entirely.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl) if maxsize > 0 else None
+        self._lock = Lock()
+        self._evictions = 0
+
+    @property
+    def enabled(self):
+        """True when values are being cached"""
+        return self._cache is not None
+
+    def get_or_load(self, key, load):
+        """Returns the cached value for key, or calls load() and caches its result"""
+        if self._cache is None:
+            return load()
+        with self._lock:
+            value = self._cache.get(key)
+            evictions = self._evictions
+        if value is not None:
+            return value
+        value = load()
+        if value is not None:
+            with self._lock:
+                if evictions == self._evictions:
+                    self._cache[key] = value
+        return value
+
+    def evict(self, key):
+        """Removes key from the cache and discards any load in progress"""
+        with self._lock:
+            self._evictions += 1
+            if self._cache is not None:
+                self._cache.pop(key, None)
+
+    def clear(self):
+        """Removes every value from the cache"""
+        with self._lock:
+            self._evictions += 1
+            if self._cache is not None:
+                self._cache.clear()
@@ -0,0 +1,23 @@
+"""
+Module: converters
+
+URL converters for the service routes
+"""
+from werkzeug.routing import IntegerConverter
+
+# Largest value of the PostgreSQL integer type used for primary keys
+MAX_ID = 2147483647
+
+
+class IdConverter(IntegerConverter):
+    """Matches ids that fit in an integer primary key column
+
+    The regex bounds the number of digits so that oversized ids are
+    rejected by a single regex match, before int() ever runs on them. It
+    spells out [0-9] because \\d also matches non-ASCII digits.
+    """
+
+    regex = r"[0-9]{1,10}"
+
+    def __init__(self, url_map):
+        super().__init__(url_map, max=MAX_ID)
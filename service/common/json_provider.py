@@ -0,0 +1,28 @@
+"""
+Module: json_provider
+
+JSON provider that serializes and parses with orjson
+"""
+import orjson
+from flask.json.provider import DefaultJSONProvider
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Drop-in replacement for Flask's JSON provider backed by orjson
+
+    Dates and datetimes are written in ISO 8601 format, which orjson does
+    natively. Other types fall back to the default Flask conversions.
+    """
+
+    def dumps(self, obj, **kwargs):
+        """Serializes obj to a JSON string"""
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        """Parses a JSON string or bytes"""
+        return orjson.loads(s)
@@ -18,6 +18,26 @@ if not DATABASE_URI:
 # Configure SQLAlchemy
 SQLALCHEMY_DATABASE_URI = DATABASE_URI
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+SQLALCHEMY_ENGINE_OPTIONS = {
+    # Test connections on checkout so stale ones are replaced transparently
+    "pool_pre_ping": True,
+    "pool_recycle": int(os.getenv("DATABASE_POOL_RECYCLE", "1800")),
+}
+# Every gunicorn worker has its own pool, so the service can open up to
+#   replicas x GUNICORN_WORKERS x (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW)
+# connections. The defaults give 3 x 4 x (5 + 2) = 84, which stays below the
+# PostgreSQL default max_connections of 100. Scale them down when adding
+# replicas or workers. Greenlets beyond the pool wait for a free connection.
+# SQLite may use a pool without a size, e.g. StaticPool for in-memory databases
+if not DATABASE_URI.startswith("sqlite"):
+    SQLALCHEMY_ENGINE_OPTIONS["pool_size"] = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    SQLALCHEMY_ENGINE_OPTIONS["max_overflow"] = int(os.getenv("DATABASE_MAX_OVERFLOW", "2"))
+
+# Configure the per-process Account cache. It is off by default (size 0)
+# because each process only sees its own evictions: only enable it when the
+# whole deployment is a single process, i.e. one replica with one worker.
+ACCOUNT_CACHE_SIZE = int(os.getenv("ACCOUNT_CACHE_SIZE", "0"))
+ACCOUNT_CACHE_TTL = int(os.getenv("ACCOUNT_CACHE_TTL", "60"))
 
 # Secret for session management
 SECRET_KEY = os.getenv("SECRET_KEY", "s3cr3t-key-shhhh")
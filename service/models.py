@@ -4,7 +4,7 @@ Models for Account
 All of the models are stored in this module
 """
 import logging
-from datetime import date
+from datetime import date, datetime
 from flask_sqlalchemy import SQLAlchemy
 
 logger = logging.getLogger("flask.app")
@@ -20,6 +20,12 @@ class DataValidationError(Exception):
 def init_db(app):
     """Initialize the SQLAlchemy app"""
     Account.init_db(app)
+    Account.upgrade_db()
+
+
+def remove_session(exception=None):  # pylint: disable=unused-argument
+    """Removes the scoped session so its connection returns to the pool"""
+    db.session.remove()
 
 
 ######################################################################
@@ -53,6 +59,51 @@ class PersistentBase:
         db.session.delete(self)
         db.session.commit()
 
+    @classmethod
+    def create_many(cls, rows):
+        """
+        Creates many records with a single multi-row INSERT
+
+        Returns the ids of the new records in the same order as rows
+        """
+        logger.info("Creating %d records", len(rows))
+        table = cls.__table__
+        result = db.session.execute(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True),
+            rows,
+        )
+        ids = result.scalars().all()
+        db.session.commit()
+        return ids
+
+    @classmethod
+    def update_by_id(cls, by_id, values):
+        """
+        Updates the record with the given ID in a single UPDATE ... RETURNING
+
+        Returns the ID of the updated record, or None if there is no record
+        with that ID
+        """
+        logger.info("Processing update for id %s ...", by_id)
+        table = cls.__table__
+        updated_id = db.session.execute(
+            table.update().where(table.c.id == by_id).values(**values).returning(table.c.id)
+        ).scalar_one_or_none()
+        db.session.commit()
+        return updated_id
+
+    @classmethod
+    def delete_by_id(cls, by_id):
+        """
+        Removes the record with the given ID in a single DELETE statement
+
+        Returns the number of rows that were deleted
+        """
+        logger.info("Processing delete for id %s ...", by_id)
+        rows = cls.query.filter_by(id=by_id).delete(synchronize_session=False)
+        db.session.commit()
+        return rows
+
     @classmethod
     def init_db(cls, app):
         """Initializes the database session"""
@@ -93,10 +144,47 @@ class Account(db.Model, PersistentBase):
     address = db.Column(db.String(256))
     phone_number = db.Column(db.String(32), nullable=True)  # phone number is optional
     date_joined = db.Column(db.Date(), nullable=False, default=date.today())
+    # Not serialized; only used to build ETags for conditional requests
+    updated_at = db.Column(
+        db.DateTime(),
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=db.func.now(),
+    )
 
     def __repr__(self):
         return f"<Account {self.name} id=[{self.id}]>"
 
+    @classmethod
+    def upgrade_db(cls):
+        """Adds columns missing from an Account table created by an older version
+
+        db.create_all() never alters existing tables, so this brings them up
+        to date in place without touching their rows. It is safe to run on
+        every start.
+        """
+        table = cls.__tablename__
+        # Check first: ALTER TABLE takes an exclusive lock even when it ends
+        # up doing nothing, which would block traffic on every restart
+        columns = {column["name"] for column in db.inspect(db.engine).get_columns(table)}
+        if "updated_at" in columns:
+            return
+        logger.info("Adding updated_at column to %s", table)
+        if db.engine.dialect.name == "postgresql":
+            # IF NOT EXISTS covers workers that start at the same time
+            db.session.execute(db.text(
+                f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS "
+                "updated_at TIMESTAMP NOT NULL DEFAULT now()"
+            ))
+        else:
+            # SQLite only allows a constant default when adding a column
+            db.session.execute(db.text(
+                f"ALTER TABLE {table} ADD COLUMN "
+                "updated_at DATETIME NOT NULL DEFAULT '1970-01-01 00:00:00'"
+            ))
+        db.session.commit()
+
     def serialize(self):
         """Serializes a Account into a dictionary"""
         return {
@@ -134,6 +222,32 @@ class Account(db.Model, PersistentBase):
             ) from error
         return self
 
+    @classmethod
+    def fingerprint(cls, after=0, limit=None):
+        """Returns the row count, highest id and latest update of a page of Accounts
+
+        The page holds the first limit Accounts with an id greater than after,
+        the same rows a keyset page reads, so the cost grows with the page
+        and not with the table. The values change whenever an Account in the
+        page is created, updated or deleted, so they can be used to tell
+        whether the page has changed
+
+        Args:
+            after (int): only include Accounts with an id greater than this
+            limit (int): the most Accounts to include, or None for all of them
+        """
+        logger.info("Processing fingerprint of records after id %s ...", after)
+        page = (
+            db.session.query(cls.id, cls.updated_at)
+            .filter(cls.id > after)
+            .order_by(cls.id)
+            .limit(limit)
+            .subquery()
+        )
+        return db.session.query(
+            db.func.count(page.c.id), db.func.max(page.c.id), db.func.max(page.c.updated_at)
+        ).one()
+
     @classmethod
     def find_by_name(cls, name):
         """Returns all Accounts with the given name
@@ -3,13 +3,43 @@ Account Service
 
 This microservice handles the lifecycle of Accounts
 """
+import orjson
 # pylint: disable=unused-import
 from flask import jsonify, request, make_response, abort, url_for   # noqa; F401
-from service.models import Account
+from flask import Response, stream_with_context
+from flask.views import MethodView
+from werkzeug.exceptions import UnsupportedMediaType
+from service.models import db, Account, DataValidationError
 from service.common import status  # HTTP Status Codes
+from service.common.cache import ReadThroughCache
 from . import app  # Import Flask application
 
 
+# Page sizes for listing accounts
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Most accounts that can be created with one bulk request
+MAX_BULK_SIZE = 1000
+
+# Read-through cache of Accounts by id. It is local to each process and
+# cannot see evictions made by other processes, so it is opt-in through
+# ACCOUNT_CACHE_SIZE and only safe when the service runs as a single process.
+account_cache = ReadThroughCache(
+    maxsize=app.config["ACCOUNT_CACHE_SIZE"], ttl=app.config["ACCOUNT_CACHE_TTL"]
+)
+
+# Static payloads are serialized once at import time. A new Response is
+# still built per request because after_request hooks (Talisman, CORS)
+# add headers to the response object they are given.
+HEALTH_BODY = orjson.dumps({"status": "OK"})
+INDEX_BODY = orjson.dumps({
+    "name": "Account REST API Service",
+    "version": "1.0",
+    # "paths": url_for("accounts", _external=True),
+})
+
+
 ############################################################
 # Health Endpoint
 ############################################################
@@ -18,7 +48,7 @@ from . import app  # Import Flask application
 @app.route("/health")
 def health():
     """Health Status"""
-    return jsonify(dict(status="OK")), status.HTTP_200_OK
+    return Response(HEALTH_BODY, status.HTTP_200_OK, mimetype="application/json")
 
 
 ######################################################################
@@ -29,149 +59,253 @@ def health():
 @app.route("/")
 def index():
     """Root URL response"""
-    return (
-        jsonify(
-            name="Account REST API Service",
-            version="1.0",
-            # paths=url_for("list_accounts", _external=True),
-        ),
-        status.HTTP_200_OK,
-    )
+    return Response(INDEX_BODY, status.HTTP_200_OK, mimetype="application/json")
 
 
 ######################################################################
-# CREATE A NEW ACCOUNT
+# ACCOUNTS COLLECTION
 ######################################################################
 
 
-@app.route("/accounts", methods=["POST"])
-def create_accounts():
-    """
-    Creates an Account
-    This endpoint will create an Account based the data in the body
-    """
-    app.logger.info("Request to create an Account")
-    check_content_type("application/json")
-    account = Account()
-    account.deserialize(request.get_json())
-    account.create()
-    message = account.serialize()
-    # Uncomment once get_accounts has been implemented
-    location_url = "/"  # Remove once get_accounts has been implemented
-    return make_response(
-        jsonify(message), status.HTTP_201_CREATED, {"Location": location_url}
-    )
+class AccountsView(MethodView):
+    """Creates and lists Accounts"""
+
+    def post(self):
+        """
+        Creates an Account
+        This endpoint will create an Account based the data in the body
+        """
+        app.logger.info("Request to create an Account")
+        check_content_type("application/json")
+        account = Account()
+        account.deserialize(load_json())
+        account.create()
+        message = account.serialize()
+        # Uncomment once get_accounts has been implemented
+        location_url = "/"  # Remove once get_accounts has been implemented
+        return make_response(
+            jsonify(message), status.HTTP_201_CREATED, {"Location": location_url}
+        )
+
+    def get(self):
+        """
+        List all account
+        This end point will return one page of accounts ordered by id, starting
+        after the id given in the "after" query parameter. The "next" value of
+        the response is the "after" of the following page, or null on the last one
+        """
+        app.logger.info("Request to view all Accounts")
+        after = request.args.get("after", default=0, type=int)
+        limit = request.args.get("limit", default=DEFAULT_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        count, max_id, last_update = Account.fingerprint(after, limit)
+        etag = f"{count}-{max_id}-{format_timestamp(last_update)}-{after}-{limit}"
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+
+        # Select plain column tuples so no Account instances are hydrated, and
+        # seek past "after" on the primary key so only one page is read
+        rows = db.session.query(
+            Account.id,
+            Account.name,
+            Account.email,
+            Account.address,
+            Account.phone_number,
+            Account.date_joined,
+        ).filter(Account.id > after).order_by(Account.id).limit(limit)
+
+        def generate():
+            """Streams the page of accounts one row at a time"""
+            yield b'{"items":['
+            returned = 0
+            last_id = None
+            for (id, name, email, address, phone_number, date_joined) in rows:
+                if returned:
+                    yield b","
+                returned += 1
+                last_id = id
+                # orjson serializes dates natively in ISO 8601 format
+                yield orjson.dumps({
+                    "id": id,
+                    "name": name,
+                    "email": email,
+                    "address": address,
+                    "phone_number": phone_number,
+                    "date_joined": date_joined
+                })
+            # A short page means there are no more accounts after it
+            yield b'],"next":' + orjson.dumps(last_id if returned == limit else None) + b"}"
+
+        response = Response(
+            stream_with_context(generate()),
+            status=status.HTTP_200_OK,
+            mimetype="application/json",
+        )
+        response.set_etag(etag, weak=True)
+        return response
+
 
 ######################################################################
-# LIST ALL ACCOUNTS
+# SINGLE ACCOUNT
 ######################################################################
 
 
-@app.route("/accounts", methods=["GET"])
-def list_accounts():
-    """
-    List all account
-    This end point will return the information of all accounts
-    """
-    app.logger.info("Request to view all Accounts")
+class AccountView(MethodView):
+    """Reads, updates and deletes the Account with the given id"""
+
+    def get(self, id):
+        """
+        Read an account
+        This end point will return the information of the Account with the given id
+        """
+        app.logger.info("Request to view an Account with id: %s", id)
+        # Validate that account with id exists
+        account = try_get_account(id)
+        # Skip the body if the client already has this version of the account
+        etag = f"{account.id}-{format_timestamp(account.updated_at)}"
+        if request.if_none_match.contains_weak(etag):
+            return not_modified(etag)
+        # Return account
+        response = jsonify(account.serialize())
+        response.set_etag(etag, weak=True)
+        return response
+
+    def put(self, id):
+        """
+        Update an account
+        This end point will update the Account based on the posted data
+        """
+        # Log request
+        app.logger.info("Request to update an Account with id: %s", id)
+        # Validate the posted data
+        try:
+            check_content_type("application/json")
+            account = Account().deserialize(load_json())
+        except (DataValidationError, UnsupportedMediaType):
+            # A missing account takes precedence over bad data
+            try_get_account(id)
+            raise
+        # Update account, which also validates that account with id exists
+        account.id = Account.update_by_id(id, account_values(account))
+        evict_account(id)
+        if account.id is None:
+            abort_account_not_found(id)
+        return account.serialize(), status.HTTP_200_OK
+
+    def delete(self, id):
+        """
+        Delete an account
+        This end point will delete the Account with the given id
+        """
+        app.logger.info("Request to delete an Account with id: %s", id)
+        # delete account, which also validates that account with id exists
+        rows = Account.delete_by_id(id)
+        evict_account(id)
+        if rows == 0:
+            abort_account_not_found(id)
+        return "", status.HTTP_204_NO_CONTENT
+
+
+app.add_url_rule("/accounts", view_func=AccountsView.as_view("accounts"))
+app.add_url_rule("/accounts/<id:id>", view_func=AccountView.as_view("account"))
 
-    accounts = Account.all()
-    accounts_serializable = [account.serialize() for account in accounts]
-    return accounts_serializable, status.HTTP_200_OK
 
 ######################################################################
-# READ AN ACCOUNT
+# CREATE ACCOUNTS IN BULK
 ######################################################################
 
 
-@app.route("/accounts/<id>", methods=["GET"])
-def read_account(id):
+@app.route("/accounts/bulk", methods=["POST"])
+def create_accounts_bulk():
     """
-    Read an account
-    This end point will return the information of the Account with the given id
+    Creates many Accounts
+    This endpoint will create an Account for each item in the posted array
+    and return the ids of the new Accounts in the same order
     """
-    app.logger.info(f"Request to view an Account with id: {id}")
-    # Validate that id is a number
-    parsed_id = try_parse_id(id)
-    # Validate that account with id exists
-    account = try_get_account(parsed_id)
-    # Return account
-    return account.serialize(), status.HTTP_200_OK
+    app.logger.info("Request to create Accounts in bulk")
+    check_content_type("application/json")
+    data = load_json()
+    if not isinstance(data, list):
+        raise DataValidationError("Invalid request: body must be an array of Accounts")
+    if len(data) > MAX_BULK_SIZE:
+        raise DataValidationError(
+            f"Invalid request: at most {MAX_BULK_SIZE} Accounts can be created at once"
+        )
+    rows = [account_values(Account().deserialize(item)) for item in data]
+    ids = Account.create_many(rows) if rows else []
+    return jsonify(ids), status.HTTP_201_CREATED
 
 
 ######################################################################
-# UPDATE AN EXISTING ACCOUNT
+#  U T I L I T Y   F U N C T I O N S
 ######################################################################
 
+def account_values(account):
+    """Returns the column values of an account, without its id"""
+    return {
+        "name": account.name,
+        "email": account.email,
+        "address": account.address,
+        "phone_number": account.phone_number,
+        "date_joined": account.date_joined
+    }
 
-@app.route("/accounts/<id>", methods=["PUT"])
-def update_account(id):
-    """
-    Update an account
-    This end point will update the Account based on the posted data
-    """
-    # Log request
-    app.logger.info(f"Request to update an Account with id: {id}")
-    # Validate that id is a number
-    parsed_id = try_parse_id(id)
-    # Validate that account with id exists
-    account = try_get_account(parsed_id)
-    # Update account
-    account.deserialize(request.get_json())
-    account.update()
-    return account.serialize(), status.HTTP_200_OK
 
+def format_timestamp(timestamp):
+    """Formats a timestamp with microseconds for use in an ETag"""
+    return timestamp.strftime("%Y%m%d%H%M%S%f") if timestamp else ""
 
-######################################################################
-# DELETE AN ACCOUNT
-######################################################################
 
+def not_modified(etag):
+    """Returns an empty 304 response for the given weak ETag"""
+    response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    response.set_etag(etag, weak=True)
+    return response
 
-@app.route("/accounts/<id>", methods=["DELETE"])
-def delete_account(id):
-    """
-    Delete an account
-    This end point will delete the Account with the given id
-    """
-    app.logger.info(f"Request to delete an Account with id: {id}")
-    # Validate that id is a number
-    parsed_id = try_parse_id(id)
-    # Validate that account with id exists
-    account = try_get_account(parsed_id)
-    # delete account
-    account.delete()
-    return "", status.HTTP_204_NO_CONTENT
 
+def load_json():
+    """Parses the request body with orjson without caching the raw body"""
+    try:
+        return orjson.loads(request.get_data(cache=False))
+    except orjson.JSONDecodeError as error:
+        raise DataValidationError(f"Invalid JSON in request body: {error}") from error
 
-######################################################################
-#  U T I L I T Y   F U N C T I O N S
-######################################################################
 
 def check_content_type(media_type):
     """Checks that the media type is correct"""
-    content_type = request.headers.get("Content-Type")
-    if content_type and content_type == media_type:
+    if request.mimetype == media_type:
         return
-    app.logger.error("Invalid Content-Type: %s", content_type)
+    app.logger.error("Invalid Content-Type: %s", request.content_type)
     abort(
         status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
         f"Content-Type must be {media_type}",
     )
 
 
-def try_parse_id(id):
-    """ Tries to parse id if valid """
-    if not id.isnumeric():
-        app.logger.error(f"Id not valid: {id}")
-        abort(status.HTTP_400_BAD_REQUEST, "Id parameter must be numeric")
-    parsed_id = int(id)
-    return parsed_id
-
-
 def try_get_account(id):
     """ Tries to get account with id if exists"""
-    account = Account.find(id)
+    account = account_cache.get_or_load(id, lambda: find_detached_account(id))
     if account is None:
-        app.logger.error(f"Account with id not found: {id}")
-        abort(status.HTTP_404_NOT_FOUND, "Account not found")
+        abort_account_not_found(id)
     return account
+
+
+def find_detached_account(id):
+    """ Finds the account with id and detaches it from the session"""
+    account = Account.find(id)
+    if account is not None:
+        # Detach the loaded account so it can outlive this request's session
+        db.session.expunge(account)
+    return account
+
+
+def evict_account(id):
+    """ Removes the account with id from the cache"""
+    account_cache.evict(id)
+
+
+def abort_account_not_found(id):
+    """ Aborts with 404 for an account id that does not exist"""
+    app.logger.error("Account with id not found: %s", id)
+    abort(status.HTTP_404_NOT_FOUND, "Account not found")
@@ -0,0 +1,55 @@
+"""
+Test cases for the read-through cache
+"""
+from unittest import TestCase
+from unittest.mock import MagicMock
+from service.common.cache import ReadThroughCache
+
+
+class TestReadThroughCache(TestCase):
+    """Test the read-through cache"""
+
+    def test_load_once(self):
+        """It should load a value once and then serve it from the cache"""
+        cache = ReadThroughCache(maxsize=10, ttl=60)
+        load = MagicMock(return_value="value")
+        self.assertEqual(cache.get_or_load(1, load), "value")
+        self.assertEqual(cache.get_or_load(1, load), "value")
+        load.assert_called_once()
+
+    def test_evict(self):
+        """It should load a value again after it is evicted"""
+        cache = ReadThroughCache(maxsize=10, ttl=60)
+        load = MagicMock(side_effect=["old", "new"])
+        cache.get_or_load(1, load)
+        cache.evict(1)
+        self.assertEqual(cache.get_or_load(1, load), "new")
+
+    def test_no_missing_values(self):
+        """It should not cache a missing value"""
+        cache = ReadThroughCache(maxsize=10, ttl=60)
+        load = MagicMock(side_effect=[None, "value"])
+        self.assertIsNone(cache.get_or_load(1, load))
+        self.assertEqual(cache.get_or_load(1, load), "value")
+
+    def test_eviction_during_load(self):
+        """It should not store a value loaded before an eviction arrived"""
+        cache = ReadThroughCache(maxsize=10, ttl=60)
+
+        def load_then_evict():
+            # A write commits and evicts while the old value is being read
+            cache.evict(1)
+            return "old"
+
+        self.assertEqual(cache.get_or_load(1, load_then_evict), "old")
+        self.assertEqual(cache.get_or_load(1, MagicMock(return_value="new")), "new")
+
+    def test_disabled(self):
+        """It should always load when the size is 0"""
+        cache = ReadThroughCache(maxsize=0, ttl=60)
+        self.assertFalse(cache.enabled)
+        load = MagicMock(return_value="value")
+        cache.get_or_load(1, load)
+        cache.get_or_load(1, load)
+        cache.evict(1)
+        self.assertEqual(load.call_count, 2)
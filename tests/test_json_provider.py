@@ -0,0 +1,30 @@
+"""
+Test cases for the orjson JSON provider
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import TestCase
+from service import app
+from service.common.json_provider import OrjsonProvider
+
+
+class TestOrjsonProvider(TestCase):
+    """Test the orjson JSON provider"""
+
+    def test_app_uses_orjson(self):
+        """It should be installed as the app JSON provider"""
+        self.assertIsInstance(app.json, OrjsonProvider)
+
+    def test_dumps(self):
+        """It should serialize dates, decimals and non-string keys"""
+        data = app.json.dumps({"b": date(2020, 1, 2), "a": Decimal("1.5"), 1: None})
+        self.assertEqual(data, '{"1":null,"a":"1.5","b":"2020-01-02"}')
+
+    def test_dumps_indent(self):
+        """It should indent when asked to"""
+        self.assertEqual(app.json.dumps({"a": 1}, indent=2), '{\n  "a": 1\n}')
+
+    def test_loads(self):
+        """It should parse strings and bytes"""
+        self.assertEqual(app.json.loads('{"a": [1, 2]}'), {"a": [1, 2]})
+        self.assertEqual(app.json.loads(b'{"a": [1, 2]}'), {"a": [1, 2]})
@@ -175,3 +175,107 @@ class TestAccount(unittest.TestCase):
         """It should not Deserialize an account with a TypeError"""
         account = Account()
         self.assertRaises(DataValidationError, account.deserialize, [])
+
+    def test_update_by_id(self):
+        """It should Update an account by id in a single statement"""
+        account = AccountFactory(email="advent@change.me")
+        account.create()
+        account_id = account.id
+        self.assertEqual(Account.update_by_id(account_id, {"email": "XYZZY@plugh.com"}), account_id)
+
+        # Fetch it back
+        account = Account.find(account.id)
+        self.assertEqual(account.email, "XYZZY@plugh.com")
+
+        # Unknown ids are not updated
+        self.assertIsNone(Account.update_by_id(0, {"email": "none@plugh.com"}))
+
+    def test_delete_by_id(self):
+        """It should Delete an account by id in a single statement"""
+        account = AccountFactory()
+        account.create()
+        account_id = account.id
+        self.assertEqual(len(Account.all()), 1)
+        self.assertEqual(Account.delete_by_id(account_id), 1)
+        self.assertEqual(len(Account.all()), 0)
+
+        # Unknown ids are not deleted
+        self.assertEqual(Account.delete_by_id(account_id), 0)
+
+    def test_create_many(self):
+        """It should Create many accounts with a single statement"""
+        fake_accounts = AccountFactory.create_batch(3)
+        ids = Account.create_many([
+            {"name": account.name, "email": account.email,
+             "address": account.address, "date_joined": account.date_joined}
+            for account in fake_accounts
+        ])
+        self.assertEqual(len(ids), 3)
+        for account_id, fake_account in zip(ids, fake_accounts):
+            account = Account.find(account_id)
+            self.assertEqual(account.name, fake_account.name)
+            self.assertEqual(account.email, fake_account.email)
+
+    def test_fingerprint(self):
+        """It should change the fingerprint when an account changes"""
+        self.assertEqual(Account.fingerprint(), (0, None, None))
+        account = AccountFactory()
+        account.create()
+        fingerprint = Account.fingerprint()
+        self.assertEqual(fingerprint[0], 1)
+        self.assertEqual(fingerprint[1], account.id)
+
+        # Updating an account by id must move its updated_at forward
+        Account.update_by_id(account.id, {"email": "XYZZY@plugh.com"})
+        self.assertGreater(Account.fingerprint()[2], fingerprint[2])
+
+    def test_fingerprint_page(self):
+        """It should only fingerprint the accounts in the given page"""
+        ids = Account.create_many([
+            {"name": account.name, "email": account.email,
+             "address": account.address, "date_joined": account.date_joined}
+            for account in AccountFactory.create_batch(4)
+        ])
+        first_page = Account.fingerprint(0, 2)
+        self.assertEqual(first_page[0], 2)
+        self.assertEqual(first_page[1], ids[1])
+        second_page = Account.fingerprint(ids[1], 2)
+        self.assertEqual(second_page[1], ids[3])
+
+        # Changes on the second page must not touch the first page
+        Account.update_by_id(ids[2], {"email": "XYZZY@plugh.com"})
+        Account.delete_by_id(ids[3])
+        self.assertEqual(Account.fingerprint(0, 2), first_page)
+        self.assertNotEqual(Account.fingerprint(ids[1], 2), second_page)
+
+    def test_upgrade_db(self):
+        """It should add updated_at to an Account table that predates it"""
+        db.session.execute(db.text("ALTER TABLE account DROP COLUMN updated_at"))
+        db.session.execute(db.text(
+            "INSERT INTO account (id, name, email, address, date_joined) "
+            "VALUES (1, 'Old', 'old@example.com', 'Old address', '2020-01-01')"
+        ))
+        db.session.commit()
+
+        Account.upgrade_db()
+        Account.upgrade_db()  # it must be safe to run again
+
+        # The existing row survives and can be read and updated
+        account = Account.find(1)
+        self.assertEqual(account.name, "Old")
+        self.assertIsNotNone(account.updated_at)
+        self.assertIsNotNone(Account.update_by_id(1, {"name": "New"}))
+
+    def test_upgrade_db_up_to_date(self):
+        """It should not alter an Account table that already has updated_at"""
+        statements = []
+
+        def record(conn, cursor, statement, *args):  # pylint: disable=unused-argument
+            statements.append(statement)
+
+        db.event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            Account.upgrade_db()
+        finally:
+            db.event.remove(db.engine, "before_cursor_execute", record)
+        self.assertFalse([sql for sql in statements if sql.startswith("ALTER")])
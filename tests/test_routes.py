@@ -8,10 +8,13 @@ Test cases can be run with the following:
 import os
 import logging
 from unittest import TestCase
+from unittest.mock import patch
+from sqlalchemy import text
 from tests.factories import AccountFactory
 from service.common import status  # HTTP Status Codes
 from service.models import db, Account, init_db
-from service.routes import app
+from service.routes import app, account_cache, MAX_BULK_SIZE
+from service.common.cache import ReadThroughCache
 from service import talisman
 
 DATABASE_URI = os.getenv(
@@ -38,6 +41,7 @@ class TestAccountService(TestCase):
         app.logger.setLevel(logging.CRITICAL)
         init_db(app)
         talisman.force_https = False
+        cls.client = app.test_client()
 
     @classmethod
     def tearDownClass(cls):
@@ -45,10 +49,18 @@ class TestAccountService(TestCase):
 
     def setUp(self):
         """Runs before each test"""
-        db.session.query(Account).delete()  # clean up the last tests
+        # clean up the last tests
+        if db.engine.dialect.name == "postgresql":
+            db.session.execute(
+                text(f"TRUNCATE {Account.__tablename__} RESTART IDENTITY CASCADE")
+            )
+        else:
+            # SQLite reuses ids once the table is empty, so DELETE is enough
+            db.session.query(Account).delete()
         db.session.commit()
+        account_cache.clear()
 
-        self.client = app.test_client()
+        self.client = self.__class__.client
 
     def tearDown(self):
         """Runs once after each test case"""
@@ -60,18 +72,17 @@ class TestAccountService(TestCase):
 
     def _create_accounts(self, count):
         """Factory method to create accounts in bulk"""
-        accounts = []
-        for _ in range(count):
-            account = AccountFactory()
-            response = self.client.post(BASE_URL, json=account.serialize())
-            self.assertEqual(
-                response.status_code,
-                status.HTTP_201_CREATED,
-                "Could not create test Account",
-            )
-            new_account = response.get_json()
-            account.id = new_account["id"]
-            accounts.append(account)
+        accounts = AccountFactory.create_batch(count)
+        response = self.client.post(
+            f"{BASE_URL}/bulk", json=[account.serialize() for account in accounts]
+        )
+        self.assertEqual(
+            response.status_code,
+            status.HTTP_201_CREATED,
+            "Could not create test Accounts",
+        )
+        for account, account_id in zip(accounts, response.get_json()):
+            account.id = account_id
         return accounts
 
     ######################################################################
@@ -82,6 +93,9 @@ class TestAccountService(TestCase):
         """It should get 200_OK from the Home Page"""
         response = self.client.get("/")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.get_json()
+        self.assertEqual(data["name"], "Account REST API Service")
+        self.assertEqual(data["version"], "1.0")
 
     def test_health(self):
         """It should be healthy"""
@@ -117,6 +131,15 @@ class TestAccountService(TestCase):
         response = self.client.post(BASE_URL, json={"name": "not enough data"})
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_account_malformed_json(self):
+        """It should not Create an Account when the body is not valid JSON"""
+        response = self.client.post(
+            BASE_URL,
+            data="{not json",
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_unsupported_media_type(self):
         """It should not Create an Account when sending the wrong media type"""
         account = AccountFactory()
@@ -127,6 +150,56 @@ class TestAccountService(TestCase):
         )
         self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
 
+    def test_create_account_with_charset(self):
+        """It should Create an Account when the media type has a charset"""
+        account = AccountFactory()
+        response = self.client.post(
+            BASE_URL,
+            json=account.serialize(),
+            content_type="application/json; charset=utf-8"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_create_accounts_in_bulk(self):
+        """It should Create many Accounts with one request"""
+        accounts = AccountFactory.create_batch(3)
+        response = self.client.post(
+            f"{BASE_URL}/bulk",
+            json=[account.serialize() for account in accounts]
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        ids = response.get_json()
+        self.assertEqual(len(ids), 3)
+
+        # Check the ids belong to the posted accounts, in order
+        for account, account_id in zip(accounts, ids):
+            new_account = self.client.get(f"{BASE_URL}/{account_id}").get_json()
+            self.assertEqual(new_account["name"], account.name)
+            self.assertEqual(new_account["email"], account.email)
+            self.assertEqual(new_account["date_joined"], str(account.date_joined))
+
+    def test_create_accounts_in_bulk_bad_request(self):
+        """It should not Create Accounts in bulk when sending the wrong data"""
+        response = self.client.post(f"{BASE_URL}/bulk", json={"name": "not an array"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        account = AccountFactory()
+        response = self.client.post(
+            f"{BASE_URL}/bulk",
+            json=[account.serialize(), {"name": "not enough data"}]
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(BASE_URL).get_json()["items"], [])
+
+    def test_create_accounts_in_bulk_too_many(self):
+        """It should not Create more Accounts in bulk than the limit"""
+        account = AccountFactory().serialize()
+        response = self.client.post(
+            f"{BASE_URL}/bulk", json=[account] * (MAX_BULK_SIZE + 1)
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(BASE_URL).get_json()["items"], [])
+
     # ADD YOUR TEST CASES HERE ...
     def test_list_all_accounts(self):
         """ It should be able to list all accounts """
@@ -137,13 +210,48 @@ class TestAccountService(TestCase):
         # When I view the interface for all accounts
         response = self.client.get("/accounts")
         self.assertEqual(status.HTTP_200_OK, response.status_code)
-        response_accounts = [account for account in response.get_json()]
+        response_accounts = [account for account in response.get_json()["items"]]
         response_ids = {account["id"] for account in response_accounts}
 
         # Then I should be able to see all three accounts with ids 1, 2, and 3 in the service
         self.assertEqual(len(created_accounts), len(response_accounts))
         self.assertSetEqual(generated_ids, response_ids)
 
+    def test_list_no_accounts(self):
+        """ It should list an empty array when there are no accounts """
+        response = self.client.get("/accounts")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual("application/json", response.mimetype)
+        self.assertEqual({"items": [], "next": None}, response.get_json())
+
+    def test_list_accounts_by_page(self):
+        """ It should list accounts one page at a time """
+        created_ids = [account.id for account in self._create_accounts(5)]
+
+        # When I page through the accounts two at a time
+        listed_ids = []
+        after = 0
+        while after is not None:
+            response = self.client.get(f"/accounts?limit=2&after={after}")
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+            page = response.get_json()
+            self.assertLessEqual(len(page["items"]), 2)
+            listed_ids += [account["id"] for account in page["items"]]
+            after = page["next"]
+
+        # Then I should see every account once, in order
+        self.assertEqual(sorted(created_ids), listed_ids)
+
+    def test_list_accounts_page_size(self):
+        """ It should cap the page size """
+        self._create_accounts(3)
+        response = self.client.get("/accounts?limit=0")
+        self.assertEqual(1, len(response.get_json()["items"]))
+        response = self.client.get("/accounts?limit=100000")
+        page = response.get_json()
+        self.assertEqual(3, len(page["items"]))
+        self.assertIsNone(page["next"])
+
     def test_read_account(self):
         """ It should be able to read an account"""
         # Given three accounts in the service with ids 1, 2 and 3
@@ -163,6 +271,68 @@ class TestAccountService(TestCase):
         self.assertEqual(response_account["phone_number"], account_to_view.phone_number)
         self.assertEqual(response_account["date_joined"], account_to_view.date_joined.strftime("%Y-%m-%d"))
 
+    def test_read_account_not_modified(self):
+        """ It should return 304 when the client has the current account """
+        account = self._create_accounts(1)[0]
+        response = self.client.get(f"/accounts/{account.id}")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+
+        # When I read the account again with the same ETag
+        response = self.client.get(f"/accounts/{account.id}", headers={"If-None-Match": etag})
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+        self.assertEqual(b"", response.data)
+
+        # Then the account must be sent again once it changes
+        response = self.client.put(f"/accounts/{account.id}", json=account.serialize())
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        response = self.client.get(f"/accounts/{account.id}", headers={"If-None-Match": etag})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertNotEqual(etag, response.headers.get("ETag"))
+
+    def test_list_accounts_not_modified(self):
+        """ It should return 304 when the client has the current list of accounts """
+        accounts = self._create_accounts(2)
+        response = self.client.get("/accounts")
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        etag = response.headers.get("ETag")
+        self.assertIsNotNone(etag)
+
+        # When I list the accounts again with the same ETag
+        response = self.client.get("/accounts", headers={"If-None-Match": etag})
+        self.assertEqual(status.HTTP_304_NOT_MODIFIED, response.status_code)
+
+        # Then the list must be sent again once an account is deleted
+        response = self.client.delete(f"/accounts/{accounts[0].id}")
+        self.assertEqual(status.HTTP_204_NO_CONTENT, response.status_code)
+        response = self.client.get("/accounts", headers={"If-None-Match": etag})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(1, len(response.get_json()["items"]))
+
+    def test_read_account_from_cache(self):
+        """ It should read an account from the database only once when caching """
+        account = self._create_accounts(1)[0]
+        cache = ReadThroughCache(maxsize=10, ttl=60)
+        with patch("service.routes.account_cache", cache), \
+                patch.object(Account, "find", wraps=Account.find) as find_mock:
+            for _ in range(2):
+                response = self.client.get(f"/accounts/{account.id}")
+                self.assertEqual(status.HTTP_200_OK, response.status_code)
+                self.assertEqual(response.get_json()["name"], account.name)
+            find_mock.assert_called_once_with(account.id)
+
+            # Updating the account must evict it from the cache
+            account.name = "Other Name"
+            self.client.put(f"/accounts/{account.id}", json=account.serialize())
+            response = self.client.get(f"/accounts/{account.id}")
+            self.assertEqual(response.get_json()["name"], "Other Name")
+            self.assertEqual(find_mock.call_count, 2)
+
+    def test_read_account_cache_disabled(self):
+        """ It should not cache accounts by default """
+        self.assertFalse(account_cache.enabled)
+
     def test_read_account_does_not_exist(self):
         """ It shouldn't read an account that doesn't exist """
         response = self.client.get("/accounts/1")
@@ -171,7 +341,19 @@ class TestAccountService(TestCase):
     def test_read_invalid_account_id(self):
         """ It should validate that the id to read is valid """
         response = self.client.get("/accounts/sample")
-        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+
+    def test_read_out_of_range_account_id(self):
+        """ It should not read an account with an id that is too large """
+        response = self.client.get("/accounts/2147483648")
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        response = self.client.get(f"/accounts/{'9' * 5000}")
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
+        # Arabic-Indic digit one is not an ASCII digit
+        account = self._create_accounts(1)[0]
+        self.assertEqual(account.id, 1)
+        response = self.client.get("/accounts/\u0661")
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
 
     def test_update_account(self):
         """ It should be able to update an account """
@@ -211,10 +393,26 @@ class TestAccountService(TestCase):
         response = self.client.put("/accounts/1")
         self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
 
+    def test_update_account_bad_request(self):
+        """ It shouldn't update an account when sending the wrong data """
+        account = self._create_accounts(1)[0]
+        response = self.client.put(f"/accounts/{account.id}", json={"name": "not enough data"})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+    def test_update_account_unsupported_media_type(self):
+        """ It shouldn't update an account when sending the wrong media type """
+        account = self._create_accounts(1)[0]
+        response = self.client.put(
+            f"/accounts/{account.id}",
+            data=app.json.dumps(account.serialize()),
+            content_type="text/plain"
+        )
+        self.assertEqual(status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, response.status_code)
+
     def test_update_invalid_account_id(self):
         """ It should validate that the id to update is valid """
         response = self.client.put("/accounts/sample")
-        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
 
     def test_delete_account(self):
         """ It should be able to delete an account"""
@@ -249,7 +447,7 @@ class TestAccountService(TestCase):
     def test_delete_invalid_account_id(self):
         """ It should validate that the id to delete is valid """
         response = self.client.delete("/accounts/sample")
-        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
 
     def test_method_not_allowed(self):
         self._create_accounts(3)